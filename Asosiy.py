@@ -11,8 +11,10 @@ def main():
     st.title("Narxlarni taqqoshlash")
     st.markdown("""Elektron tijorat platformalaridagi tovarlar narxlari haqida ma'lumot olish.""")
     
-    df_ex = pd.read_csv('ex.csv')
-    df = pd.read_csv('uz.csv')
+    version_ex = dataset_version('ex.csv')
+    version_in = dataset_version('uz.csv')
+    df_ex = load_dataset('ex.csv', version_ex)
+    df = load_dataset('uz.csv', version_in)
     max_ex = df_ex['Price_USD'].max()
     max_in = df['Price_USD'].max()
     # Summary statistics 
@@ -37,9 +39,8 @@ def main():
     # Loop through products and generate KDE plots
     for i, product in enumerate(product_types[:3]):
         with columns[i]:
-            product_data = df_ex[(df_ex['Product'] == product) & (df_ex['Source'].isin(selected_sources_e))]['Price_USD'].dropna()
-            if not product_data.empty:  # Check if data exists
-                fig = create_kde_plot(product_data, product)
+            fig = kde_figure_spec('ex.csv', version_ex, product, tuple(sorted(selected_sources_e)))
+            if fig is not None:  # Check if data exists
                 st.plotly_chart(fig, key=f"{product}_tashqi", config={'displayModeBar': False})
             else:
                 st.warning(f"No data available for {product} from selected sources")
@@ -54,9 +55,8 @@ def main():
     # Loop through products and generate KDE plots
     for i, product in enumerate(product_types[:3]):
         with columns[i]:
-            product_data = df[(df['Product'] == product) & (df['Source'].isin(selected_sources_i))]['Price_USD'].dropna()
-            if not product_data.empty:  # Check if data exists
-                fig = create_kde_plot(product_data, product)
+            fig = kde_figure_spec('uz.csv', version_in, product, tuple(sorted(selected_sources_i)))
+            if fig is not None:  # Check if data exists
                 st.plotly_chart(fig, key=f"{product}_ichki", config={'displayModeBar': False})
             else:
                 st.warning(f"No data available for {product} from selected sources")
@@ -67,26 +67,12 @@ def main():
     col5, col6 = st.columns(2)
     with col5:
         selected_products = st.pills("Tovarni tanlash", options=df_ex['Product'].unique(), selection_mode='multi', default=df_ex['Product'].unique(), key='tovar_pills_ex')
-        source_counts_e = df_ex[df_ex['Product'].isin(selected_products)].groupby("Source")['Title'].count().reset_index()
-        source_counts_e.columns = ['Manba', 'Soni']
-        fig = px.bar(
-            source_counts_e,
-            x="Manba",
-            y="Soni",
-            title="Tashqi manba kesimida mahsulotlar soni"
-            )
+        fig = source_count_figure_spec('ex.csv', version_ex, tuple(sorted(selected_products)), "Tashqi manba kesimida mahsulotlar soni")
         st.plotly_chart(fig, key='tashqi_manba', config={'displayModeBar': False})
     
     with col6:
         selected_products_i = st.pills("Tovarni tanlash", options=df['Product'].unique(), selection_mode='multi', default=df['Product'].unique(), key='tovar_pills_in')
-        source_counts_i = df[df['Product'].isin(selected_products_i)].groupby("Source")['Title'].count().reset_index()
-        source_counts_i.columns = ['Manba', 'Soni']
-        fig = px.bar(
-            source_counts_i,
-            x="Manba",
-            y="Soni",
-            title="Ichki manba kesimida mahsulotlar soni"
-            )
+        fig = source_count_figure_spec('uz.csv', version_in, tuple(sorted(selected_products_i)), "Ichki manba kesimida mahsulotlar soni")
         st.plotly_chart(fig, key='ichki_manba', config={'displayModeBar': False})
     
     df_all = pd.concat([df, df_ex])
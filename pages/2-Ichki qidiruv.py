@@ -5,6 +5,8 @@ import plotly.graph_objects as go
 from typing import Dict, List, Tuple
 import numpy as np
 from utils.utils import *
+from utils.archive import ResponseArchive
+from utils.matcher import compile_exclusions
 
 st.set_page_config(layout="wide")
 
@@ -31,15 +33,12 @@ def main():
                 st.error("Mahsulot nomini kiriting")
             else:
                 with st.spinner("Qidiruv amalga oshirilmoqda..."):
-                    scraper = PriceScraperMultiUz()
+                    # Compiled once per exclusion list; unwanted listings are dropped while parsing
+                    exclude = compile_exclusions(excluded_words)
+                    scraper = PriceScraperMultiUz(archive=ResponseArchive(), exclude=exclude)
                     df = scraper.scrape_all(product)
                     
                     if not df.empty:
-                        # Filter data
-                        if excluded_words:
-                            exclude_pattern = '|'.join(word.strip().lower() for word in excluded_words.split(','))
-                            df = df[~df['Title'].str.lower().str.contains(exclude_pattern, na=False)]
-                        
                         df = df[(df['Price_USD'] >= min_price) & (df['Price_USD'] <= max_price)]
                         
                         if df.empty:
@@ -0,0 +1,43 @@
+import os
+
+import pytest
+
+for module in ('zstandard', 'streamlit', 'pandas', 'requests', 'bs4', 'scipy', 'plotly'):
+    pytest.importorskip(module)
+
+from utils.archive import ResponseArchive, replay
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def read_fixture(name: str) -> bytes:
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+def test_store_is_content_addressed(tmp_path):
+    archive = ResponseArchive(str(tmp_path))
+    body = read_fixture('asaxiy_search_dom.html')
+    first = archive.store(body, source='asaxiy', query='lenovo', status=200)
+    second = archive.store(body, source='asaxiy', query='lenovo', status=200)
+    assert first == second
+    assert archive.load(first) == body
+    assert len(list(archive.entries())) == 2
+
+
+def test_replay_reports_bad_pages_and_dedupes(tmp_path):
+    archive = ResponseArchive(str(tmp_path))
+    page = read_fixture('asaxiy_search_state.html')
+    for _ in range(2):
+        archive.store(page, source='asaxiy', query='lenovo', base_url='https://asaxiy.uz', status=200, scrape_id='s1')
+    bad = archive.store(page, source='retired_shop', query='lenovo', status=200, scrape_id='s1')
+    archive.store(b'blocked', source='asaxiy', query='lenovo', status=403, scrape_id='s1')
+    with open(os.path.join(archive.root, 'index.jsonl'), 'a', encoding='utf-8') as f:
+        f.write('{"digest": "0000", "source": "uzum", "status": 200}\n')
+
+    df, failures = replay(archive, max_workers=2)
+
+    # The same page archived twice in one scrape is deduplicated like a live scrape
+    assert len(df) == 3
+    assert list(df['Price_USD']) == sorted(df['Price_USD'])
+    assert {(failure['source'], failure['digest']) for failure in failures} == {('retired_shop', bad), ('uzum', '0000')}
@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from utils.matcher import KeywordMatcher, compile_exclusions, fold
+
+
+def test_overlapping_and_suffix_terms():
+    matcher = KeywordMatcher(['he', 'she', 'his', 'hers'])
+    assert matcher.search('ushers')
+    assert matcher.search('ahishers')
+    # 'she' fails over to its suffix 'he'
+    assert matcher.search('shx he')
+    assert not matcher.search('hxs')
+    assert not matcher.search('')
+
+
+def test_suffix_term_inside_longer_term():
+    # 'ase' is only reachable through the failure link of 'case'
+    matcher = KeywordMatcher(['case', 'ase'])
+    assert matcher.search('vase')
+    assert not matcher.search('cas')
+
+
+def test_cyrillic_case_folding():
+    matcher = compile_exclusions('ЧЕХОЛ, Сумка')
+    assert matcher.search('Чехол для iPhone 15')
+    assert matcher.search('СУМКА для ноутбука')
+    assert matcher.search('чехол-книжка')
+    assert not matcher.search('Смартфон Samsung')
+
+
+def test_latin_case_folding():
+    matcher = compile_exclusions('Cover')
+    assert matcher.search('Silicone COVER for Galaxy')
+    assert compile_exclusions('strasse').search('Große Straße')
+
+
+@pytest.mark.parametrize('title', ["G'ilof qora", 'Gʻilof qora', 'G’ilof qora', 'G‘ilof qora', 'Gʼilof qora', 'G`ilof qora'])
+def test_apostrophe_variants(title):
+    assert compile_exclusions("gʻilof").search(title)
+
+
+@pytest.mark.parametrize('words', ['', '   ', ' , ,  ', None])
+def test_empty_lists(words):
+    assert compile_exclusions(words) is None
+
+
+def test_compiled_once_per_list():
+    assert compile_exclusions('case, cover') is compile_exclusions(' COVER ,case,,')
+    assert compile_exclusions('case') is not compile_exclusions('cover')
+
+
+def test_regex_metacharacters_are_literal():
+    matcher = compile_exclusions('c++, (case')
+    assert matcher.search('Book: C++ Primer')
+    assert matcher.search('Phone (case)')
+    assert not matcher.search('c+ case')
+
+
+def test_agrees_with_substring_search():
+    rng = random.Random(0)
+    alphabet = 'abcд'
+    for _ in range(2000):
+        terms = [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 6))]
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 15)))
+        assert KeywordMatcher(terms).search(text) == any(fold(term) in text for term in terms)
+
+
+def test_mask():
+    pd = pytest.importorskip('pandas')
+    titles = pd.Series(['iPhone 15 Case', 'iPhone 15', None, 'Чехол iPhone'], index=[3, 5, 7, 9])
+    mask = compile_exclusions('case, чехол').mask(titles)
+    assert mask.dtype == bool
+    assert list(mask.index) == [3, 5, 7, 9]
+    assert list(mask) == [True, False, False, True]
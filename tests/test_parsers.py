@@ -0,0 +1,98 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+for module in ('streamlit', 'pandas', 'requests', 'bs4', 'scipy', 'plotly'):
+    pytest.importorskip(module)
+
+from utils.utils import PriceScraperMulti, PriceScraperMultiUz
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def read_fixture(name: str) -> bytes:
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+def test_amazon_json_ld():
+    items = PriceScraperMulti().parse('amazon.com', read_fixture('amazon_search_jsonld.html'), 'https://www.amazon.com')
+    assert [(item['Title'], item['Price_USD']) for item in items] == [
+        ('Apple AirPods Pro (2nd Generation)', 189.99),
+        ('Apple AirPods 4', 1029.0),
+    ]
+
+
+def test_amazon_dom_fallback():
+    items = PriceScraperMulti().parse('amazon.de', read_fixture('amazon_search_dom.html'), 'https://www.amazon.de')
+    assert [item['Title'] for item in items] == ['Samsung Galaxy Buds3 Pro', 'Sony WF-1000XM5']
+    assert items[0]['Currency'] == 'EUR'
+    assert items[0]['Price_USD'] == pytest.approx(199 * 1.11459)
+
+
+def test_asaxiy_state_currency():
+    items = PriceScraperMultiUz().parse('asaxiy', read_fixture('asaxiy_search_state.html'), 'https://asaxiy.uz')
+    prices = {item['Title']: item['Price_USD'] for item in items}
+    assert prices['Lenovo IdeaPad Slim 3 15IRH8'] == pytest.approx(6499000 / 13000)
+    assert prices['Сумка для ноутбука Lenovo T210'] == pytest.approx(299000 / 13000)
+    # Offers already quoted in USD are not converted again
+    assert prices['Lenovo Legion 5 (USD)'] == 1150
+    assert items[0]['Link'] == 'https://asaxiy.uz/product/noutbuk-lenovo-ideapad-slim-3'
+
+
+def test_asaxiy_dom_fallback():
+    items = PriceScraperMultiUz().parse('asaxiy', read_fixture('asaxiy_search_dom.html'), 'https://asaxiy.uz')
+    assert [(item['Title'], item['Price_USD']) for item in items] == [
+        ('Lenovo IdeaPad Slim 3', pytest.approx(6500000 / 13000)),
+        ('Сумка для ноутбука Lenovo T210', pytest.approx(299000 / 13000)),
+    ]
+    # The product link, not the compare button that precedes it
+    assert items[0]['Link'] == 'https://asaxiy.uz/product/noutbuk-lenovo-ideapad-slim-3'
+
+
+def test_uzum_api_links():
+    items = PriceScraperMultiUz().parse('uzum_api', read_fixture('uzum_search_api.json'), 'https://uzum.uz')
+    assert items[0]['Link'] == 'https://uzum.uz/uz/product/745210'
+    assert items[0]['Price_USD'] == pytest.approx(5199000 / 13000)
+
+
+@pytest.fixture
+def recorded_server():
+    """Serve recorded payloads locally: GETs get the Asaxiy page, POSTs the Uzum API response"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def reply(self, body: bytes, content_type: str):
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self.reply(read_fixture('asaxiy_search_state.html'), 'text/html; charset=utf-8')
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            self.reply(read_fixture('uzum_search_api.json'), 'application/json')
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_scrapers_against_recorded_server(recorded_server, monkeypatch):
+    scraper = PriceScraperMultiUz(base_urls={'asaxiy': recorded_server, 'uzum': recorded_server, 'uzum_api': recorded_server})
+    monkeypatch.setattr(scraper, 'get_random_delay', lambda: 0)
+
+    asaxiy = scraper.scrape_asaxiy('lenovo')
+    assert len(asaxiy) == 3
+    assert asaxiy['Link'].str.startswith(recorded_server).all()
+
+    uzum = scraper.scrape_uzum('samsung a55')
+    assert list(uzum['Title']) == ['Smartfon Samsung Galaxy A55 8/256 GB', 'Chexol Samsung Galaxy A55 uchun']
@@ -0,0 +1,146 @@
+import os
+
+import pytest
+
+pd = pytest.importorskip('pandas')
+for module in ('streamlit', 'requests', 'bs4', 'scipy', 'plotly'):
+    pytest.importorskip(module)
+
+from utils.refresh import RefreshPlanner, listing_keys
+
+
+def test_listing_keys_ignore_shared_links():
+    # Asaxiy cards used to all point at the compare page
+    rows = [{'Source': 'Asaxiy', 'Title': f"Lenovo {i}", 'Link': 'https://asaxiy.uz/compare'} for i in range(5)]
+    keys = listing_keys(rows)
+    assert keys == [f"Asaxiy|Lenovo {i}" for i in range(5)]
+
+
+def test_listing_keys_unique_for_repeated_titles():
+    rows = [
+        {'Source': 'Uzum', 'Title': 'Chexol', 'Link': 'https://uzum.uz/uz/product/1'},
+        {'Source': 'Uzum', 'Title': 'Chexol', 'Link': 'https://uzum.uz/uz/product/2'},
+        {'Source': 'Asaxiy', 'Title': 'Chexol', 'Link': 'https://asaxiy.uz/compare'},
+        {'Source': 'Asaxiy', 'Title': 'Chexol', 'Link': 'https://asaxiy.uz/compare'},
+        {'Source': 'Zoodmall', 'Title': 'Chexol', 'Link': None},
+    ]
+    keys = listing_keys(rows)
+    assert len(set(keys)) == len(keys)
+    assert keys[0] == 'Uzum|Chexol|https://uzum.uz/uz/product/1'
+    assert keys[2:] == ['Asaxiy|Chexol#1', 'Asaxiy|Chexol#2', 'Zoodmall|Chexol']
+
+
+def test_shipped_dataset_keys_are_unique():
+    df = pd.read_csv(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'uz.csv'))
+    for _, rows in df.groupby('Product'):
+        records = rows.to_dict('records')
+        assert len(set(listing_keys(records))) == len(records)
+
+
+def test_record_tracks_price_changes(tmp_path):
+    planner = RefreshPlanner(str(tmp_path / 'state.json'), str(tmp_path / 'deltas.jsonl'))
+    first = pd.DataFrame([
+        {'Source': 'Asaxiy', 'Title': 'A', 'Price_USD': 10.0, 'Link': 'https://asaxiy.uz/compare'},
+        {'Source': 'Asaxiy', 'Title': 'B', 'Price_USD': 20.0, 'Link': 'https://asaxiy.uz/compare'},
+    ])
+    planner.record('lenovo', first, scraped_at=0)
+
+    second = first.copy()
+    second.loc[1, 'Price_USD'] = 25.0
+    delta = planner.record('lenovo', second, scraped_at=3600)
+    assert delta['new'] == {} and delta['gone'] == []
+    assert list(delta['changed']) == ['Asaxiy|B']
+    assert planner.state['queries']['lenovo']['rate'] == pytest.approx(0.5)
+
+
+def test_failed_scrape_keeps_listings(tmp_path):
+    deltas_path = tmp_path / 'deltas.jsonl'
+    planner = RefreshPlanner(str(tmp_path / 'state.json'), str(deltas_path))
+    df = pd.DataFrame([{'Source': 'Uzum', 'Title': 'A', 'Price_USD': 10.0, 'Link': None}])
+    planner.record('phone', df, scraped_at=0)
+    planner.record('phone', df, scraped_at=3600)
+    # Only the baseline is logged; the unchanged second scrape adds nothing
+    assert len(deltas_path.read_text(encoding='utf-8').splitlines()) == 1
+
+    delta = planner.record('phone', pd.DataFrame(), scraped_at=7200)
+    entry = planner.state['queries']['phone']
+    assert delta['failed']
+    assert entry['listings'] == {'Uzum|A': {'Title': 'A', 'Source': 'Uzum', 'Price_USD': 10.0}}
+    assert entry['rate'] == 0
+    assert entry['last_scraped'] == 7200
+    assert len(deltas_path.read_text(encoding='utf-8').splitlines()) == 1
+
+    # Recovering from the failure is not counted as everything being new
+    delta = planner.record('phone', df, scraped_at=10800)
+    assert delta['new'] == {} and entry['rate'] == 0
+
+
+def test_blocked_source_is_carried_forward(tmp_path):
+    deltas_path = tmp_path / 'deltas.jsonl'
+    planner = RefreshPlanner(str(tmp_path / 'state.json'), str(deltas_path))
+    full = pd.DataFrame([
+        {'Source': 'Uzum', 'Title': 'A', 'Price_USD': 10.0, 'Link': None},
+        {'Source': 'Asaxiy', 'Title': 'B', 'Price_USD': 20.0, 'Link': None},
+        {'Source': 'Asaxiy', 'Title': 'C', 'Price_USD': 30.0, 'Link': None},
+    ])
+    planner.record('lenovo', full, scraped_at=0)
+    planner.record('lenovo', full, scraped_at=3600)
+
+    # Asaxiy blocked us: only Uzum rows come back, with A's price changed
+    partial = pd.DataFrame([{'Source': 'Uzum', 'Title': 'A', 'Price_USD': 12.0, 'Link': None}])
+    delta = planner.record('lenovo', partial, scraped_at=7200)
+    entry = planner.state['queries']['lenovo']
+    assert delta['gone'] == [] and delta['new'] == {}
+    assert list(delta['changed']) == ['Uzum|A']
+    assert delta['missing_sources'] == ['Asaxiy']
+    assert set(entry['listings']) == {'Uzum|A', 'Asaxiy|B', 'Asaxiy|C'}
+    # Only Uzum's one listing was compared, and it changed
+    assert entry['rate'] == pytest.approx(0.3)
+
+    # Asaxiy coming back unchanged is not reported as new
+    delta = planner.record('lenovo', full.assign(Price_USD=[12.0, 20.0, 30.0]), scraped_at=10800)
+    assert delta['new'] == {} and delta['gone'] == [] and delta['changed'] == {}
+
+
+def test_zero_timestamp_is_respected(tmp_path):
+    planner = RefreshPlanner(str(tmp_path / 'state.json'), str(tmp_path / 'deltas.jsonl'))
+    df = pd.DataFrame([{'Source': 'Uzum', 'Title': 'A', 'Price_USD': 10.0, 'Link': None}])
+    assert planner.record('phone', df, scraped_at=0)['scraped_at'] == 0
+    assert planner.state['queries']['phone']['last_scraped'] == 0
+    planner.watch(['tablet'])
+    assert planner.plan(2, now=0) == ['tablet', 'phone']
+
+
+class CountingScraper:
+    """Stands in for a scraper: sends a fixed number of requests per query"""
+
+    def __init__(self, requests_per_scrape: int):
+        self.requests_per_scrape = requests_per_scrape
+        self.request_count = 0
+        self.queries = []
+
+    def scrape_all(self, query):
+        self.request_count += self.requests_per_scrape
+        self.queries.append(query)
+        return pd.DataFrame([{'Source': 'Uzum', 'Title': query, 'Price_USD': 1.0, 'Link': None}])
+
+
+def test_refresh_never_exceeds_budget(tmp_path):
+    planner = RefreshPlanner(str(tmp_path / 'state.json'), str(tmp_path / 'deltas.jsonl'), requests_per_query=4)
+    planner.watch([f"q{i}" for i in range(10)])
+
+    # Worst case every time: 10 // 4 queries
+    scraper = CountingScraper(4)
+    planner.refresh(scraper, budget=10)
+    assert scraper.request_count <= 10 and len(scraper.queries) == 2
+
+    # Cheaper real scrapes leave room for more queries, still within budget
+    scraper = CountingScraper(2)
+    planner.refresh(scraper, budget=10)
+    assert scraper.request_count <= 10 and len(scraper.queries) == 4
+
+
+def test_scraper_worst_case_counts():
+    from utils.utils import PriceScraperMulti, PriceScraperMultiUz
+    assert PriceScraperMulti.max_requests_per_query == 5
+    assert PriceScraperMultiUz.max_requests_per_query == 4
@@ -0,0 +1,55 @@
+import json
+import os
+
+from utils.structured import extract_api_products, extract_json_ld, extract_json_state, extract_structured
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def read_fixture(name: str) -> bytes:
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+def test_json_ld_item_list():
+    items = extract_json_ld(read_fixture('amazon_search_jsonld.html'))
+    assert [item['title'] for item in items] == ['Apple AirPods Pro (2nd Generation)', 'Apple AirPods 4']
+    assert items[0] == {'title': 'Apple AirPods Pro (2nd Generation)', 'price': '189.99', 'currency': 'USD',
+                        'url': '/dp/B0D1XD1ZV3', 'id': 'B0D1XD1ZV3'}
+    # Offers given as a list use the first offer
+    assert items[1]['price'] == '1,029.00'
+
+
+def test_structured_prefers_json_ld_over_state():
+    items = extract_structured(read_fixture('amazon_search_jsonld.html'))
+    assert len(items) == 2
+
+
+def test_state_blob_skips_objects_without_product_context():
+    items = extract_json_state(read_fixture('asaxiy_search_state.html'))
+    assert [item['id'] for item in items] == [101, 102, 103]
+    assert 'Mehmon' not in [item['title'] for item in items]
+
+
+def test_state_blob_without_listings_is_empty():
+    # Only a stray {"name", "price"} object: callers must fall back to the DOM
+    assert extract_structured(read_fixture('amazon_search_dom.html')) == []
+
+
+def test_api_payload():
+    items = extract_api_products(read_fixture('uzum_search_api.json'))
+    assert [(item['id'], item['price']) for item in items] == [(745210, 5199000), (812004, 39000)]
+    assert extract_api_products(json.loads(read_fixture('uzum_search_api.json'))) == items
+
+
+def test_api_payload_invalid_json():
+    assert extract_api_products(b'<html>blocked</html>') == []
+
+
+def test_json_ld_structured_currency():
+    page = ('<script type="application/ld+json">{"@type": "Product", "name": "Kopfhörer", "sku": "X1", '
+            '"offers": {"price": 49, "priceCurrency": {"@value": "EUR"}}}</script>'
+            '<script type="application/ld+json">{"@type": "Product", "name": "Odd", "sku": "X2", '
+            '"offers": {"price": 5, "priceCurrency": {"code": "EUR"}}}</script>')
+    items = extract_json_ld(page)
+    assert [item['currency'] for item in items] == ['EUR', None]
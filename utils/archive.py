@@ -0,0 +1,149 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+import zstandard
+
+from utils.utils import PriceScraperMulti, PriceScraperMultiUz, combine_results
+
+ARCHIVE_DIR = os.environ.get('ICOMMERCE_ARCHIVE', 'archive')
+# Streamlit serves sessions from threads, so index appends are serialized
+INDEX_LOCK = threading.Lock()
+
+
+class ResponseArchive:
+    """Content-addressed store of raw fetched pages.
+
+    Bodies are zstd-compressed under objects/<sha256[:2]>/<sha256>.zst, so a page
+    fetched twice is stored once. Every fetch appends a metadata line to index.jsonl.
+    """
+
+    def __init__(self, root: str = ARCHIVE_DIR, level: int = 10):
+        self.root = root
+        self.level = level
+        self.index_path = os.path.join(root, 'index.jsonl')
+        os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+
+    def object_path(self, digest: str) -> str:
+        return os.path.join(self.root, 'objects', digest[:2], f"{digest}.zst")
+
+    def store(self, body: bytes, **meta) -> str:
+        """Save a response body with its metadata, returning the body digest"""
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file first so a crash never leaves a truncated object
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(zstandard.ZstdCompressor(level=self.level).compress(body))
+            os.replace(tmp_path, path)
+
+        record = {'digest': digest, 'size': len(body), 'fetched_at': time.time(), **meta}
+        with INDEX_LOCK:
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return digest
+
+    def load(self, digest: str) -> bytes:
+        """Read back a stored body"""
+        with open(self.object_path(digest), 'rb') as f:
+            return zstandard.ZstdDecompressor().decompress(f.read())
+
+    def entries(self) -> Iterator[Dict]:
+        """Iterate over the metadata of every archived fetch"""
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def reparse_entry(root: str, entry: Dict) -> Tuple[List[Dict], Optional[str]]:
+    """Run the current parser over one archived page (process pool worker).
+
+    Returns the rows and, when the page could not be reparsed, the error instead of
+    raising, so one bad page does not abort the whole replay.
+    """
+    try:
+        source = entry['source']
+        scraper = PriceScraperMultiUz() if source in PriceScraperMultiUz.sources else PriceScraperMulti()
+        content = ResponseArchive(root).load(entry['digest'])
+
+        rows = scraper.parse(source, content, entry.get('base_url', ''))
+    except Exception as e:
+        return [], f"{type(e).__name__}: {e}"
+
+    for row in rows:
+        row['Product'] = entry.get('query')
+        row['Fetched_at'] = entry.get('fetched_at')
+    return rows, None
+
+
+def scrape_key(entry: Dict) -> tuple:
+    """Which scrape a page belongs to; entries archived before scrape ids fall back to query and market"""
+    if entry.get('scrape_id'):
+        return (entry['scrape_id'],)
+    market = 'uz' if entry['source'] in PriceScraperMultiUz.sources else 'ex'
+    return (entry.get('query'), market)
+
+
+def replay(archive: ResponseArchive, max_workers: int = None) -> Tuple[pd.DataFrame, List[Dict]]:
+    """Rebuild the dataset from archived pages with the current parsers, without re-crawling.
+
+    Returns the dataset and the pages that failed to reparse (digest, source, error).
+    """
+    entries = [entry for entry in archive.entries() if entry.get('status') == 200]
+    failures = []
+    if not entries:
+        return pd.DataFrame(), failures
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        results = pool.map(reparse_entry, [archive.root] * len(entries), entries,
+                           chunksize=max(1, len(entries) // ((max_workers or os.cpu_count() or 1) * 4)))
+
+        # Regroup pages by the scrape_all call that fetched them, then dedupe and sort like the live path
+        scrapes = {}
+        for entry, (page_rows, error) in zip(entries, results):
+            if error is not None:
+                failures.append({'digest': entry.get('digest'), 'source': entry.get('source'), 'error': error})
+                continue
+            scrapes.setdefault(scrape_key(entry), []).extend(page_rows)
+
+    frames = [combine_results([pd.DataFrame(rows)]) for rows in scrapes.values() if rows]
+    if not frames:
+        return pd.DataFrame(), failures
+    return pd.concat(frames, ignore_index=True), failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reparse archived pages with the current parsers")
+    parser.add_argument('--archive', default=ARCHIVE_DIR, help="Archive directory")
+    parser.add_argument('--workers', type=int, default=None, help="Parser processes (default: CPU count)")
+    parser.add_argument('--output', default=None, help="CSV file for the rebuilt dataset")
+    args = parser.parse_args()
+
+    archive = ResponseArchive(args.archive)
+    start = time.perf_counter()
+    df, failures = replay(archive, args.workers)
+    elapsed = time.perf_counter() - start
+
+    pages = sum(1 for entry in archive.entries() if entry.get('status') == 200)
+    print(f"{pages} pages -> {len(df)} rows in {elapsed:.2f}s ({pages / elapsed if elapsed else 0:.1f} pages/s)")
+    for failure in failures:
+        print(f"failed {failure['source']} {failure['digest']}: {failure['error']}")
+    if failures:
+        print(f"{len(failures)} of {pages} pages failed to reparse")
+    if args.output:
+        df.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
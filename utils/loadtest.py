@@ -0,0 +1,227 @@
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+import numpy as np
+import psutil
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = {
+    'main': 'Asosiy.py',
+    'external': os.path.join('pages', '1-Tashqi qidiruv.py'),
+    'internal': os.path.join('pages', '2-Ichki qidiruv.py'),
+}
+SITES = ('amazon.com', 'amazon.co.uk', 'amazon.de', 'ebay', 'zoodmall', 'uzum', 'uzum_api', 'asaxiy')
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers every shop request with a canned search result page and counts the hits"""
+
+    listings = 40
+
+    def products(self) -> List[Dict]:
+        rng = random.Random(self.path)
+        return [{'title': f"Stand-in product {i}", 'price': round(rng.uniform(5, 1500), 2), 'id': i}
+                for i in range(self.listings)]
+
+    def send(self, body: bytes, content_type: str):
+        with self.server.lock:
+            self.server.request_count += 1
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        ld = {'@context': 'https://schema.org', '@type': 'ItemList', 'itemListElement': [
+            {'@type': 'Product', 'name': p['title'], 'url': f"/p/{p['id']}",
+             'offers': {'@type': 'Offer', 'price': p['price'], 'priceCurrency': 'USD'}}
+            for p in self.products()
+        ]}
+        page = f'<html><head><script type="application/ld+json">{json.dumps(ld)}</script></head><body></body></html>'
+        self.send(page.encode('utf-8'), 'text/html; charset=utf-8')
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        items = [{'catalogCard': {'productId': p['id'], 'title': p['title'], 'minSellPrice': int(p['price'] * 13000)}}
+                 for p in self.products()]
+        self.send(json.dumps({'data': {'makeSearch': {'items': items}}}).encode('utf-8'), 'application/json')
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stand_in() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.lock = threading.Lock()
+    server.request_count = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# Outbound requests one search rerun sends when the stand-in answers every source:
+# eBay stops after its first URL, plus three Amazon domains; Uzum's API answers, plus Zoodmall and Asaxiy
+REQUESTS_PER_SEARCH = {'external': 4, 'internal': 3}
+
+
+def toggle_pills(app, defaults: List[list], step: int):
+    """Change one pill selection so the rerun has to build figures it has not cached yet"""
+    group = app.button_group[step % len(defaults)]
+    default = defaults[step % len(defaults)]
+    if not default:
+        group.set_value(default)
+        return
+    dropped = default[(step // len(defaults)) % len(default)]
+    value = default if list(group.value) != default else [option for option in default if option != dropped]
+    group.set_value(value)
+
+
+def run_session(page: str, reruns: int, query: str, timeout: float) -> Dict:
+    """Drive one headless session of a page in its own process.
+
+    Returns (label, seconds) latency samples plus this process's RSS and CPU time.
+    Raises if any rerun fails to render, so lost reruns never count as samples.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.join(ROOT, PAGES[page]), default_timeout=timeout)
+    samples = []
+
+    def timed(label: str, run):
+        start = time.perf_counter()
+        run()
+        samples.append((label, time.perf_counter() - start))
+        if app.exception:
+            raise RuntimeError(f"{page} raised: {app.exception[0].message}")
+
+    timed(page, app.run)
+    defaults = [list(group.value) for group in app.button_group] if page == 'main' else []
+
+    for step in range(reruns):
+        if page == 'main':
+            # Alternate between an unchanged rerun (cache hits) and a pill change (figure rebuilds)
+            if step % 2 and defaults:
+                toggle_pills(app, defaults, step // 2)
+                timed('main (pill change)', app.run)
+            else:
+                timed(page, app.run)
+        else:
+            app.text_input[0].input(query)
+            timed(page, app.button[0].click().run)
+            if not app.success:
+                raise RuntimeError(f"{page} search rerun {step} rendered no results")
+
+    process = psutil.Process()
+    cpu = process.cpu_times()
+    return {
+        'page': page,
+        'samples': samples,
+        'rss_mb': process.memory_info().rss / 2**20,
+        'cpu_s': cpu.user + cpu.system,
+    }
+
+
+def load_test(sessions: int, reruns: int, query: str, timeout: float) -> Dict:
+    """Run N concurrent sessions per page, each in its own process, against the stand-in server.
+
+    Streamlit keeps a process-wide Runtime, so AppTest sessions sharing a process
+    interfere with each other; separate processes also give a real RSS per session.
+    """
+    wall_start = time.perf_counter()
+
+    results, errors = [], []
+    context = multiprocessing.get_context('spawn')
+    # One fresh process per session, never reused, so RSS and Streamlit state are its own
+    with ProcessPoolExecutor(max_workers=sessions * len(PAGES), mp_context=context, max_tasks_per_child=1) as pool:
+        futures = [pool.submit(run_session, page, reruns, query, timeout) for page in PAGES for _ in range(sessions)]
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                errors.append(str(e))
+
+    wall = time.perf_counter() - wall_start
+    cpu = sum(result['cpu_s'] for result in results)
+    rss = [result['rss_mb'] for result in results]
+
+    report = {
+        'sessions': sessions * len(PAGES),
+        'failed_sessions': len(errors),
+        'errors': errors,
+        'wall_s': round(wall, 2),
+        'cpu_s': round(cpu, 2),
+        'cpu_util': round(cpu / wall, 2) if wall else 0.0,
+        'rss_per_session_mb': {
+            'mean': round(float(np.mean(rss)), 1) if rss else None,
+            'max': round(float(np.max(rss)), 1) if rss else None,
+        },
+        'expected_outbound_requests': sessions * reruns * sum(REQUESTS_PER_SEARCH.values()),
+        'pages': {},
+    }
+
+    latencies = {}
+    for result in results:
+        for label, seconds in result['samples']:
+            latencies.setdefault(label, []).append(seconds)
+    for label, values in latencies.items():
+        report['pages'][label] = {
+            'reruns': len(values),
+            'p50_s': round(float(np.percentile(values, 50)), 3),
+            'p95_s': round(float(np.percentile(values, 95)), 3),
+            'p99_s': round(float(np.percentile(values, 99)), 3),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent analysts against the Streamlit app")
+    parser.add_argument('--sessions', type=int, default=5, help="Concurrent sessions per page")
+    parser.add_argument('--reruns', type=int, default=5, help="Reruns per session after the first render")
+    parser.add_argument('--query', default='iphone 15', help="Search term for the search pages")
+    parser.add_argument('--timeout', type=float, default=120, help="Per-run timeout in seconds")
+    parser.add_argument('--max-p95', type=float, default=None, help="Fail if any page's p95 rerun latency exceeds this")
+    args = parser.parse_args()
+
+    server = start_stand_in()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    # Must be set before the session processes import utils.utils / utils.archive
+    os.environ['ICOMMERCE_BASE_URLS'] = json.dumps({site: base_url for site in SITES})
+    # The stand-in needs no politeness delay; leaving it in would make latency mostly random sleep
+    os.environ['ICOMMERCE_REQUEST_DELAY'] = '0'
+    os.environ['ICOMMERCE_ARCHIVE'] = tempfile.mkdtemp(prefix='icommerce-loadtest-')
+    os.chdir(ROOT)
+
+    report = load_test(args.sessions, args.reruns, args.query, args.timeout)
+    report['outbound_requests'] = server.request_count
+    server.shutdown()
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    failed = False
+    if report['errors']:
+        print(f"{report['failed_sessions']} sessions failed", file=sys.stderr)
+        failed = True
+    if report['outbound_requests'] != report['expected_outbound_requests']:
+        print(f"Sent {report['outbound_requests']} outbound requests, expected {report['expected_outbound_requests']}",
+              file=sys.stderr)
+        failed = True
+    if args.max_p95 is not None:
+        slow = [page for page, stats in report['pages'].items() if stats['p95_s'] > args.max_p95]
+        if slow:
+            print(f"p95 above {args.max_p95}s on: {', '.join(slow)}", file=sys.stderr)
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
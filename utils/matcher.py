@@ -0,0 +1,78 @@
+from functools import lru_cache
+from typing import Iterable, Optional, Tuple
+
+# Uzbek Latin spells o' / g' with several look-alike apostrophes
+APOSTROPHES = str.maketrans({'ʻ': "'", 'ʼ': "'", '’': "'", '‘': "'", '`': "'"})
+
+
+def fold(text: str) -> str:
+    """Case-fold (Latin and Cyrillic alike) and unify apostrophes"""
+    return text.casefold().translate(APOSTROPHES)
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton answering "does this text contain any of the terms?".
+
+    A title is scanned once regardless of how many terms there are, so matching
+    stays linear in text length even for exclusion lists of hundreds of words.
+    """
+
+    def __init__(self, terms: Iterable[str]):
+        self.goto = [{}]
+        self.fail = [0]
+        self.terminal = [False]
+        for term in terms:
+            self.add(fold(term))
+        self.link()
+
+    def add(self, term: str):
+        node = 0
+        for char in term:
+            if char not in self.goto[node]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.terminal.append(False)
+                self.goto[node][char] = len(self.goto) - 1
+            node = self.goto[node][char]
+        self.terminal[node] = True
+
+    def link(self):
+        """Breadth-first pass filling failure links; a node matches if any suffix state does"""
+        queue = list(self.goto[0].values())
+        for node in queue:
+            for char, child in self.goto[node].items():
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                self.fail[child] = self.goto[state].get(char, 0)
+                self.terminal[child] = self.terminal[child] or self.terminal[self.fail[child]]
+                queue.append(child)
+
+    def search(self, text: str) -> bool:
+        goto, fail, terminal = self.goto, self.fail, self.terminal
+        node = 0
+        for char in fold(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if terminal[node]:
+                return True
+        return False
+
+    def mask(self, titles):
+        """Boolean Series marking titles that contain a term; missing titles never match"""
+        return titles.map(lambda title: isinstance(title, str) and self.search(title)).astype(bool)
+
+
+@lru_cache(maxsize=64)
+def _compile(terms: Tuple[str, ...]) -> KeywordMatcher:
+    return KeywordMatcher(terms)
+
+
+def compile_exclusions(words: str) -> Optional[KeywordMatcher]:
+    """Build (or reuse) the matcher for a comma-separated exclusion list"""
+    terms = {fold(word.strip()) for word in (words or '').split(',')}
+    terms.discard('')
+    if not terms:
+        return None
+    return _compile(tuple(sorted(terms)))
@@ -0,0 +1,186 @@
+import argparse
+import json
+import os
+import time
+from collections import Counter
+from typing import Dict, List
+
+import pandas as pd
+
+from utils.utils import PriceScraperMulti, PriceScraperMultiUz
+
+# Weight of the latest scrape in the per-query change rate (exponential moving average)
+ALPHA = 0.3
+# Listings whose USD price moved less than this are treated as unchanged
+PRICE_TOLERANCE = 0.01
+# Calm queries still get refreshed eventually
+MIN_RATE = 0.05
+
+MARKETS = {
+    'ex': (PriceScraperMulti, 'ex.csv'),
+    'uz': (PriceScraperMultiUz, 'uz.csv'),
+}
+
+
+def listing_keys(rows: List[Dict]) -> List[str]:
+    """Identify listings across scrapes by source + title.
+
+    Scraped links are not reliable ids (several shops yield one link for many cards),
+    so a link only disambiguates titles repeated within a scrape, and only when it is
+    unique; remaining repeats are numbered in page order.
+    """
+    base_keys = [f"{row.get('Source')}|{row.get('Title')}" for row in rows]
+    repeated = Counter(base_keys)
+    links = Counter(row.get('Link') for row in rows)
+
+    keys, seen = [], Counter()
+    for key, row in zip(base_keys, rows):
+        link = row.get('Link')
+        if repeated[key] > 1:
+            if isinstance(link, str) and link and links[link] == 1:
+                key = f"{key}|{link}"
+            else:
+                seen[key] += 1
+                key = f"{key}#{seen[key]}"
+        keys.append(key)
+
+    if len(set(keys)) != len(keys):
+        raise ValueError("Listing keys are not unique within the scrape")
+    return keys
+
+
+class RefreshPlanner:
+    """Tracks how often each watched query changes and spends a request budget accordingly.
+
+    The state file holds only the latest price per listing and each query's change
+    rate; history lives in an append-only log of deltas (new, changed, gone listings).
+    A query's first scrape is logged in full as its baseline, so the log alone can
+    rebuild any past snapshot; after that only changes are written.
+    """
+
+    def __init__(self, state_path: str, deltas_path: str, requests_per_query: int = 1):
+        # Worst-case outbound requests of one query, so a refresh never exceeds its budget
+        self.state_path = state_path
+        self.deltas_path = deltas_path
+        self.requests_per_query = requests_per_query
+        self.state = {'queries': {}}
+        if os.path.exists(state_path):
+            with open(state_path, encoding='utf-8') as f:
+                self.state = json.load(f)
+
+    def save(self):
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    def watch(self, queries: List[str]):
+        """Add queries to the watchlist; unseen ones are scheduled first"""
+        for query in queries:
+            self.state['queries'].setdefault(query, {'rate': None, 'last_scraped': None, 'listings': {}})
+
+    def record(self, query: str, df: pd.DataFrame, scraped_at: float = None) -> Dict:
+        """Diff a fresh scrape against the last one, log the delta and update the change rate"""
+        if scraped_at is None:
+            scraped_at = time.time()
+        self.watch([query])
+        entry = self.state['queries'][query]
+        previous = entry['listings']
+
+        # scrape_all returns an empty frame when every source failed or blocked us; that says
+        # nothing about the listings, so keep them and the rate, and only push the query back
+        if df.empty:
+            entry['last_scraped'] = scraped_at
+            self.save()
+            return {'query': query, 'scraped_at': scraped_at, 'new': {}, 'changed': {}, 'gone': [], 'failed': True,
+                    'missing_sources': sorted({value['Source'] for value in previous.values()})}
+
+        rows = [row for row in df.to_dict('records') if pd.notna(row.get('Price_USD'))]
+        current = {}
+        for key, row in zip(listing_keys(rows), rows):
+            current[key] = {'Title': row.get('Title'), 'Source': row.get('Source'),
+                            'Price_USD': round(float(row['Price_USD']), 2)}
+
+        # A source with no rows this time was most likely blocked or failed, so its stored
+        # listings are carried forward rather than reported gone and then new again
+        reported = {value['Source'] for value in current.values()}
+        carried = {key: value for key, value in previous.items() if value['Source'] not in reported}
+        compared = {key: value for key, value in previous.items() if value['Source'] in reported}
+
+        new = {key: value for key, value in current.items() if key not in compared}
+        changed = {key: value for key, value in current.items()
+                   if key in compared and abs(value['Price_USD'] - compared[key]['Price_USD']) > PRICE_TOLERANCE}
+        gone = [key for key in compared if key not in current]
+
+        # The first scrape is a baseline, not a measurement of change
+        if entry['last_scraped'] is not None:
+            observed = (len(new) + len(changed) + len(gone)) / max(len(compared.keys() | current.keys()), 1)
+            entry['rate'] = observed if entry['rate'] is None else ALPHA * observed + (1 - ALPHA) * entry['rate']
+
+        delta = {'query': query, 'scraped_at': scraped_at, 'new': new, 'changed': changed, 'gone': gone, 'failed': False,
+                 'missing_sources': sorted({value['Source'] for value in carried.values()})}
+        if new or changed or gone:
+            with open(self.deltas_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(delta, ensure_ascii=False) + '\n')
+
+        entry['listings'] = {**carried, **current}
+        entry['last_scraped'] = scraped_at
+        self.save()
+        return delta
+
+    def priority(self, query: str, now: float) -> float:
+        """Expected number of missed changes: change rate times hours since the last scrape"""
+        entry = self.state['queries'][query]
+        if entry['last_scraped'] is None:
+            return float('inf')
+        rate = max(entry['rate'] if entry['rate'] is not None else 1.0, MIN_RATE)
+        return rate * (now - entry['last_scraped']) / 3600
+
+    def ranked(self, now: float = None) -> List[str]:
+        """Watched queries, most overdue first"""
+        if now is None:
+            now = time.time()
+        return sorted(self.state['queries'], key=lambda query: self.priority(query, now), reverse=True)
+
+    def plan(self, budget: int, now: float = None) -> List[str]:
+        """Queries that fit a budget of outbound requests even if each costs the worst case"""
+        return self.ranked(now)[:budget // self.requests_per_query]
+
+    def refresh(self, scraper, budget: int) -> List[Dict]:
+        """Scrape queries in priority order while the requests actually sent leave room for another worst case"""
+        start = scraper.request_count
+        deltas = []
+        for query in self.ranked():
+            if scraper.request_count - start + self.requests_per_query > budget:
+                break
+            deltas.append(self.record(query, scraper.scrape_all(query)))
+        return deltas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the most volatile watched queries")
+    parser.add_argument('--market', choices=MARKETS, default='uz', help="ex: external sources, uz: internal sources")
+    parser.add_argument('--budget', type=int, default=20, help="Outbound requests to spend")
+    args = parser.parse_args()
+
+    scraper_class, dataset = MARKETS[args.market]
+    planner = RefreshPlanner(f"refresh_{args.market}.json", f"deltas_{args.market}.jsonl",
+                             scraper_class.max_requests_per_query)
+
+    # Seed the watchlist and baseline listings from the shipped dataset
+    if not planner.state['queries'] and os.path.exists(dataset):
+        df = pd.read_csv(dataset)
+        for query, rows in df.groupby('Product'):
+            planner.record(query, rows)
+
+    for delta in planner.refresh(scraper_class(), args.budget):
+        if delta['failed']:
+            print(f"{delta['query']}: scrape failed, kept previous listings")
+            continue
+        print(f"{delta['query']}: {len(delta['new'])} new, {len(delta['changed'])} changed, {len(delta['gone'])} gone")
+        if delta['missing_sources']:
+            print(f"  no rows from {', '.join(delta['missing_sources'])}, kept their previous listings")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import json
+import re
+from typing import Dict, Iterator, List, Optional
+
+# Keys under which shops keep the product name / price in their JSON state blobs
+TITLE_KEYS = ('name', 'title', 'productTitle', 'localizableTitle')
+PRICE_KEYS = ('price', 'sellPrice', 'minSellPrice', 'salePrice', 'currentPrice', 'lowPrice')
+CURRENCY_KEYS = ('priceCurrency', 'currency', 'currencyCode')
+URL_KEYS = ('url', 'link', 'href', 'productUrl')
+ID_KEYS = ('productId', 'id', 'sku')
+
+# Inline <script> blocks; scanning these is much cheaper than building the whole DOM
+SCRIPT_TAG = re.compile(r'<script\b([^>]*)>(.*?)</script\s*>', re.IGNORECASE | re.DOTALL)
+SCRIPT_TYPE = re.compile(r'type\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+# window.__INITIAL_STATE__ = {...}; style assignments inside inline scripts
+STATE_ASSIGNMENT = re.compile(r'(?:window\.)?__[A-Z_]+__\s*=\s*')
+
+
+def _load_json(text: str):
+    """Parse a JSON document, returning None instead of raising"""
+    try:
+        return json.loads(text)
+    except (ValueError, TypeError):
+        return None
+
+
+def _first(obj: Dict, keys) -> Optional[object]:
+    for key in keys:
+        value = obj.get(key)
+        if value not in (None, '', [], {}):
+            return value
+    return None
+
+
+def _scalar(value) -> Optional[object]:
+    """Unwrap {'value': 12.5}-style price/text objects"""
+    if isinstance(value, dict):
+        value = _first(value, ('value', '@value', 'amount', 'text', 'uz', 'ru', 'en'))
+    if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+        return value
+    return None
+
+
+def _is_type(obj: Dict, name: str) -> bool:
+    kind = obj.get('@type')
+    if isinstance(kind, list):
+        return name in kind
+    return kind == name
+
+
+def _offer(offers) -> Dict:
+    if isinstance(offers, list):
+        offers = offers[0] if offers else {}
+    return offers if isinstance(offers, dict) else {}
+
+
+def _json_ld_products(node) -> Iterator[Dict]:
+    """Walk a JSON-LD document and yield schema.org Product entries"""
+    if isinstance(node, list):
+        for child in node:
+            yield from _json_ld_products(child)
+        return
+    if not isinstance(node, dict):
+        return
+
+    if _is_type(node, 'Product'):
+        offer = _offer(node.get('offers'))
+        price = _scalar(_first(offer, PRICE_KEYS))
+        if node.get('name') and price is not None:
+            yield {
+                'title': str(node['name']).strip(),
+                'price': price,
+                'currency': _scalar(_first(offer, CURRENCY_KEYS)),
+                'url': node.get('url') or offer.get('url'),
+                'id': node.get('sku'),
+            }
+        return
+
+    for key in ('@graph', 'itemListElement', 'item', 'mainEntity'):
+        if key in node:
+            yield from _json_ld_products(node[key])
+
+
+def _state_products(node, depth: int = 0) -> Iterator[Dict]:
+    """Walk an arbitrary JSON state blob and yield objects that look like listings"""
+    if depth > 40:
+        return
+    if isinstance(node, list):
+        for child in node:
+            yield from _state_products(child, depth + 1)
+        return
+    if not isinstance(node, dict):
+        return
+
+    title = _scalar(_first(node, TITLE_KEYS))
+    price = _scalar(_first(node, PRICE_KEYS))
+    url = _scalar(_first(node, URL_KEYS))
+    product_id = _scalar(_first(node, ID_KEYS))
+    # A name and a price alone also match users, banners, etc.; listings carry an id or a URL
+    if isinstance(title, str) and price is not None and (isinstance(url, str) or product_id is not None):
+        yield {
+            'title': title.strip(),
+            'price': price,
+            'currency': _scalar(_first(node, CURRENCY_KEYS)),
+            'url': url if isinstance(url, str) else None,
+            'id': product_id,
+        }
+        return
+
+    for value in node.values():
+        if isinstance(value, (dict, list)):
+            yield from _state_products(value, depth + 1)
+
+
+def _scripts(html) -> Iterator[tuple]:
+    """Yield (type, body) for every inline script in the page"""
+    if isinstance(html, bytes):
+        html = html.decode('utf-8', errors='replace')
+    for match in SCRIPT_TAG.finditer(html or ''):
+        kind = SCRIPT_TYPE.search(match.group(1))
+        yield (kind.group(1).lower() if kind else ''), match.group(2).strip()
+
+
+def extract_json_ld(html) -> List[Dict]:
+    """Collect Product entries from <script type="application/ld+json"> blocks"""
+    items = []
+    for kind, body in _scripts(html):
+        if kind == 'application/ld+json':
+            data = _load_json(body)
+            if data is not None:
+                items.extend(_json_ld_products(data))
+    return items
+
+
+def extract_json_state(html) -> List[Dict]:
+    """Collect listings from embedded JSON state (__NEXT_DATA__, window.__X__ = {...})"""
+    items = []
+    for kind, body in _scripts(html):
+        if not body or kind == 'application/ld+json':
+            continue
+
+        if kind == 'application/json':
+            data = _load_json(body)
+        else:
+            match = STATE_ASSIGNMENT.search(body)
+            if not match:
+                continue
+            try:
+                data, _ = json.JSONDecoder().raw_decode(body, match.end())
+            except ValueError:
+                continue
+
+        if data is not None:
+            items.extend(_state_products(data))
+    return items
+
+
+def extract_structured(html) -> List[Dict]:
+    """Prefer JSON-LD, then embedded state; an empty list means fall back to HTML selectors"""
+    return extract_json_ld(html) or extract_json_state(html)
+
+
+def extract_api_products(payload) -> List[Dict]:
+    """Collect listings from a site's JSON search API response"""
+    if isinstance(payload, (str, bytes)):
+        payload = _load_json(payload)
+    if payload is None:
+        return []
+    return list(_state_products(payload))
@@ -12,10 +12,44 @@ import random
 from scipy.stats import gaussian_kde
 import plotly.graph_objects as go
 import numpy as np
+from urllib.parse import urljoin
+import os
+import json
+import uuid
+from utils.structured import extract_structured, extract_api_products
+
+# Site root overrides from the environment, e.g. a local stand-in server for load tests
+BASE_URLS = json.loads(os.environ.get('ICOMMERCE_BASE_URLS', '{}'))
+# Fixed delay between requests in seconds, e.g. 0 against a stand-in server; unset keeps the random delay
+REQUEST_DELAY = os.environ.get('ICOMMERCE_REQUEST_DELAY')
+
+# Uzum renders its catalog client-side, so listings come from its GraphQL search API
+UZUM_SEARCH_QUERY = """
+query getMakeSearch($queryInput: MakeSearchQueryInput!) {
+  makeSearch(query: $queryInput) {
+    items { catalogCard { ... on SkuGroupCard { productId title minSellPrice } } }
+  }
+}
+"""
+
+# Combine per-source results of one scrape; shared by live scrapes and archive replays
+def combine_results(results: List[pd.DataFrame]) -> pd.DataFrame:
+    df = pd.concat(results, ignore_index=True)
+
+    # Remove duplicates and sort by price
+    df = df.drop_duplicates(subset=['Title', 'Price_USD'], keep='first')
+    df = df.sort_values('Price_USD')
+
+    return df
 
 #Scraping external sources
 class PriceScraperMulti:
-    def __init__(self):
+    # Archive source keys this scraper knows how to parse
+    sources = ('amazon.com', 'amazon.co.uk', 'amazon.de', 'ebay')
+    # Worst case per scrape_all: two eBay URLs plus three Amazon domains
+    max_requests_per_query = 5
+
+    def __init__(self, base_urls: Dict[str, str] = None, archive=None, exclude=None):
         # Enhanced headers to better mimic a real browser
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36',
@@ -32,11 +66,38 @@ class PriceScraperMulti:
         }
         # Session for maintaining cookies
         self.session = requests.Session()
+        # Site root overrides, e.g. to replay recorded pages from a local server
+        self.base_urls = base_urls or dict(BASE_URLS)
+        # Optional ResponseArchive keeping every fetched body for offline reparsing
+        self.archive = archive
+        # Groups the archived pages of one scrape_all call so replays dedupe them together
+        self.scrape_id = None
+        # Outbound requests sent by this scraper, for request budgets
+        self.request_count = 0
+        # Optional KeywordMatcher; listings whose title matches are dropped while parsing
+        self.exclude = exclude
 
     def get_random_delay(self):
         """Add random delay between requests to avoid rate limiting"""
+        if REQUEST_DELAY is not None:
+            return float(REQUEST_DELAY)
         return random.uniform(1, 3)
 
+    def fetch(self, source: str, product: str, url: str, base_url: str, **kwargs) -> requests.Response:
+        """GET a page and archive the raw body"""
+        self.request_count += 1
+        response = self.session.get(url, headers=self.headers, timeout=15, **kwargs)
+        if self.archive is not None:
+            self.archive.store(response.content, source=source, query=product, url=url,
+                               base_url=base_url, status=response.status_code, scrape_id=self.scrape_id)
+        return response
+
+    def without_excluded(self, items: List[Dict]) -> List[Dict]:
+        """Drop rows whose title matches the exclusion list"""
+        if self.exclude is None:
+            return items
+        return [item for item in items if not (item['Title'] and self.exclude.search(item['Title']))]
+
     def clean_price(self, price_str: str) -> float:
         """Enhanced price cleaning function"""
         if not price_str:
@@ -65,9 +126,66 @@ class PriceScraperMulti:
         except (ValueError, IndexError):
             return None
 
+    def structured_items(self, entries: List[Dict], source: str, currency: str) -> List[Dict]:
+        """Convert JSON-LD / embedded JSON entries into result rows"""
+        items = []
+        for entry in entries:
+            price = entry['price']
+            price_value = self.clean_price(price) if isinstance(price, str) else float(price)
+            if price_value and price_value > 0:
+                entry_currency = entry.get('currency') or currency
+                items.append({
+                    'Title': entry['title'],
+                    'Price': price_value,
+                    'Currency': entry_currency,
+                    'Source': source,
+                    'Price_USD': price_value * self.conversion_rates.get(entry_currency, 1)
+                })
+        return items
+
+    def parse(self, source: str, content: bytes, base_url: str) -> List[Dict]:
+        """Parse a fetched page by its archive source key"""
+        if source.startswith('amazon.'):
+            return self.without_excluded(self.parse_amazon(content, source[len('amazon.'):]))
+        if source == 'ebay':
+            return self.without_excluded(self.parse_ebay(content))
+        raise ValueError(f"Unknown source: {source}")
+
+    def parse_amazon(self, content: bytes, domain: str) -> List[Dict]:
+        """Extract listings from an Amazon search page"""
+        # Embedded JSON is far cheaper to read than the DOM; selectors are the fallback
+        items = self.structured_items(extract_structured(content), f'Amazon {domain.upper()}', self.get_currency(domain))
+        if items:
+            return items
+
+        soup = BeautifulSoup(content, 'html.parser')
+
+        # Find all product containers
+        products = soup.find_all('div', {'data-component-type': 's-search-result'})
+
+        for product in products:
+            try:
+                title = product.find('span', {'class': 'a-text-normal'}) or product.find('h2')
+                price = product.find('span', {'class': 'a-price-whole'}) or product.find('span', {'class': 'a-offscreen'})
+
+                if title and price:
+                    price_value = self.clean_price(price.text)
+                    if price_value and price_value > 0:
+                        currency = self.get_currency(domain)
+                        items.append({
+                            'Title': title.text.strip(),
+                            'Price': price_value,
+                            'Currency': currency,
+                            'Source': f'Amazon {domain.upper()}',
+                            'Price_USD': price_value * self.conversion_rates.get(currency, 1)
+                        })
+            except Exception:
+                continue
+        return items
+
     def scrape_amazon(self, domain: str, product: str) -> pd.DataFrame:
         """Scrape product data from Amazon"""
-        base_url = f"https://www.amazon.{domain}"
+        base_url = self.base_urls.get(f'amazon.{domain}', f"https://www.amazon.{domain}")
         search_url = f"{base_url}/s?k={product.replace(' ', '+')}&ref=nb_sb_noss"
         
         try:
@@ -75,32 +193,8 @@ class PriceScraperMulti:
             time.sleep(self.get_random_delay())
             
             # Fetch the search page
-            response = self.session.get(search_url, headers=self.headers, timeout=15, verify=False)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Find all product containers
-            products = soup.find_all('div', {'data-component-type': 's-search-result'})
-            
-            items = []
-            for product in products:
-                try:
-                    title = product.find('span', {'class': 'a-text-normal'}) or product.find('h2')
-                    price = product.find('span', {'class': 'a-price-whole'}) or product.find('span', {'class': 'a-offscreen'})
-                    
-                    if title and price:
-                        price_value = self.clean_price(price.text)
-                        if price_value and price_value > 0:
-                            currency = self.get_currency(domain)
-                            items.append({
-                                'Title': title.text.strip(),
-                                'Price': price_value,
-                                'Currency': currency,
-                                'Source': f'Amazon {domain.upper()}',
-                                'Price_USD': price_value * self.conversion_rates.get(currency, 1)
-                            })
-                except Exception:
-                    continue 
-            return pd.DataFrame(items)
+            response = self.fetch(f'amazon.{domain}', product, search_url, base_url, verify=False)
+            return pd.DataFrame(self.without_excluded(self.parse_amazon(response.content, domain)))
         except requests.exceptions.SSLError as ssl_error:
             st.warning(f"SSL error while accessing Amazon {domain}: {str(ssl_error)}")
             return pd.DataFrame()
@@ -108,6 +202,40 @@ class PriceScraperMulti:
             st.warning(f"Error scraping Amazon {domain}: {str(e)}")
             return pd.DataFrame()
 
+    def parse_ebay(self, content: bytes) -> List[Dict]:
+        """Extract listings from an eBay search page"""
+        items = self.structured_items(extract_structured(content), 'eBay', 'USD')
+        if items:
+            return items
+
+        soup = BeautifulSoup(content, 'html.parser')
+
+        # Try different selectors for product containers
+        products = (soup.find_all('div', {'class': 's-item__info'}) or
+                  soup.find_all('div', {'class': 'srp-river-results'}))
+
+        for product in products:
+            try:
+                # Try different possible selectors for title and price
+                title = (product.find('div', {'class': 's-item__title'}) or
+                       product.find('h3', {'class': 's-item__title'}))
+
+                price = (product.find('span', {'class': 's-item__price'}) or
+                       product.find('span', {'class': 'POSITIVE'}))
+
+                if title and price and 'Shop on eBay' not in title.text:
+                    price_value = self.clean_price(price.text)
+                    if price_value and price_value > 0:
+                        items.append({
+                            'Title': title.text.strip(),
+                            'Price': price_value,
+                            'Currency': 'USD',
+                            'Source': 'eBay',
+                            'Price_USD': price_value
+                        })
+            except Exception as e:
+                continue
+        return items
 
     def scrape_ebay(self, product: str) -> pd.DataFrame:
         """Scrape product data from eBay with enhanced error handling"""
@@ -116,42 +244,17 @@ class PriceScraperMulti:
             time.sleep(self.get_random_delay())
             
             # Try different eBay URLs
+            base_url = self.base_urls.get('ebay', 'https://www.ebay.com')
             urls = [
-                f"https://www.ebay.com/sch/i.html?_nkw={product.replace(' ', '+')}",
-                f"https://www.ebay.com/sch/i.html?_nkw={product.replace(' ', '+')}&_sacat=0"
+                f"{base_url}/sch/i.html?_nkw={product.replace(' ', '+')}",
+                f"{base_url}/sch/i.html?_nkw={product.replace(' ', '+')}&_sacat=0"
             ]
             
             items = []
             for url in urls:
-                response = self.session.get(url, headers=self.headers, timeout=15)
+                response = self.fetch('ebay', product, url, base_url)
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    
-                    # Try different selectors for product containers
-                    products = (soup.find_all('div', {'class': 's-item__info'}) or
-                              soup.find_all('div', {'class': 'srp-river-results'}))
-                    
-                    for product in products:
-                        try:
-                            # Try different possible selectors for title and price
-                            title = (product.find('div', {'class': 's-item__title'}) or
-                                   product.find('h3', {'class': 's-item__title'}))
-                            
-                            price = (product.find('span', {'class': 's-item__price'}) or
-                                   product.find('span', {'class': 'POSITIVE'}))
-                            
-                            if title and price and 'Shop on eBay' not in title.text:
-                                price_value = self.clean_price(price.text)
-                                if price_value and price_value > 0:
-                                    items.append({
-                                        'Title': title.text.strip(),
-                                        'Price': price_value,
-                                        'Currency': 'USD',
-                                        'Source': 'eBay',
-                                        'Price_USD': price_value
-                                    })
-                        except Exception as e:
-                            continue                              
+                    items = self.without_excluded(self.parse_ebay(response.content))
                 if items:
                     break                    
             return pd.DataFrame(items)
@@ -172,6 +275,7 @@ class PriceScraperMulti:
         """Scrape data from all sources"""
         amazon_domains = ['com', 'co.uk', 'de']
         results = []
+        self.scrape_id = uuid.uuid4().hex
         
         # First try eBay (often more reliable)
         ebay_df = self.scrape_ebay(product)
@@ -189,17 +293,16 @@ class PriceScraperMulti:
             return pd.DataFrame()
             
         # Combine all results
-        df = pd.concat(results, ignore_index=True)
-        
-        # Remove duplicates and sort by price
-        df = df.drop_duplicates(subset=['Title', 'Price_USD'], keep='first')
-        df = df.sort_values('Price_USD')
-        
-        return df
+        return combine_results(results)
 
 #Scraping internal sources
 class PriceScraperMultiUz:
-    def __init__(self):
+    # Archive source keys this scraper knows how to parse
+    sources = ('zoodmall', 'uzum', 'uzum_api', 'asaxiy')
+    # Worst case per scrape_all: Zoodmall, Uzum API, Uzum page fallback and Asaxiy
+    max_requests_per_query = 4
+
+    def __init__(self, base_urls: Dict[str, str] = None, archive=None, exclude=None):
         # Enhanced headers to better mimic a real browser
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
@@ -212,11 +315,38 @@ class PriceScraperMultiUz:
 
         # Session for maintaining cookies
         self.session = requests.Session()
+        # Site root overrides, e.g. to replay recorded pages from a local server
+        self.base_urls = base_urls or dict(BASE_URLS)
+        # Optional ResponseArchive keeping every fetched body for offline reparsing
+        self.archive = archive
+        # Groups the archived pages of one scrape_all call so replays dedupe them together
+        self.scrape_id = None
+        # Outbound requests sent by this scraper, for request budgets
+        self.request_count = 0
+        # Optional KeywordMatcher; listings whose title matches are dropped while parsing
+        self.exclude = exclude
 
     def get_random_delay(self):
         """Add random delay between requests to avoid rate limiting"""
+        if REQUEST_DELAY is not None:
+            return float(REQUEST_DELAY)
         return random.uniform(1, 3)
 
+    def fetch(self, source: str, product: str, url: str, base_url: str, method: str = 'GET', **kwargs) -> requests.Response:
+        """Request a page and archive the raw body"""
+        self.request_count += 1
+        response = self.session.request(method, url, headers=self.headers, timeout=15, **kwargs)
+        if self.archive is not None:
+            self.archive.store(response.content, source=source, query=product, url=url,
+                               base_url=base_url, status=response.status_code, scrape_id=self.scrape_id)
+        return response
+
+    def without_excluded(self, items: List[Dict]) -> List[Dict]:
+        """Drop rows whose title matches the exclusion list"""
+        if self.exclude is None:
+            return items
+        return [item for item in items if not (item['Title'] and self.exclude.search(item['Title']))]
+
     def clean_price(self, price_str: str) -> float:
         """Enhanced price cleaning function"""
         if not price_str:
@@ -245,46 +375,101 @@ class PriceScraperMultiUz:
         except (ValueError, IndexError):
             return None
         
+    def structured_items(self, entries: List[Dict], source: str, base_url: str, product_path: str = None) -> List[Dict]:
+        """Convert JSON-LD / embedded JSON / API entries into result rows"""
+        items = []
+        for entry in entries:
+            price = entry['price']
+            price = self.clean_price(price) if isinstance(price, str) else price
+            if not price:
+                continue
+
+            if entry.get('url'):
+                link = urljoin(base_url + '/', entry['url'])
+            elif entry.get('id') is not None and product_path:
+                link = base_url + product_path.format(id=entry['id'])
+            else:
+                link = base_url
+
+            # Local shops quote in so'm unless the offer says otherwise
+            currency = str(entry.get('currency') or 'UZS').upper()
+            if currency == 'UZS':
+                price_value = float(price)/13000
+            elif currency == 'USD':
+                price_value = float(price)
+            else:
+                continue
+
+            if price_value > 0:
+                items.append({
+                    'Title': entry['title'],
+                    'Price': price_value,
+                    'Currency': 'USD',
+                    'Source': source,
+                    'Price_USD': price_value,
+                    'Link': link
+                })
+        return items
+
+    def parse(self, source: str, content: bytes, base_url: str) -> List[Dict]:
+        """Parse a fetched page by its archive source key"""
+        parsers = {
+            'zoodmall': self.parse_zoodmall,
+            'uzum': self.parse_uzum,
+            'uzum_api': self.parse_uzum_api,
+            'asaxiy': self.parse_asaxiy,
+        }
+        if source not in parsers:
+            raise ValueError(f"Unknown source: {source}")
+        return self.without_excluded(parsers[source](content, base_url))
+
 # scraping ZOODMALL price data
+    def parse_zoodmall(self, content: bytes, base_url: str) -> List[Dict]:
+        """Extract listings from a ZoodMall search page"""
+        items = self.structured_items(extract_structured(content), 'Zoodmall', base_url)
+        if items:
+            return items
+
+        soup = BeautifulSoup(content, 'html.parser')
+        products = soup.find_all('div', {'class': 'product-item-list'})
+
+        for product in products:
+            try:
+                # Try different possible selectors for title and price
+                title = product.find('div', class_='product-mini__title').text.strip()
+
+                price = product.find('div', class_='product-mini__totalLocalPrice').text.strip()
+                price = (price.split(' ')[-1]).replace(',', '')
+
+                link = base_url + product.find('a', class_='product-mini')['href']
+                price_value = int(price)/13000
+                if price_value and price_value > 0:
+                    items.append({
+                        'Title': title,
+                        'Price': price_value,
+                        'Currency': 'USD',
+                        'Source': 'Zoodmall',
+                        'Price_USD': price_value,
+                        'Link': link
+                    })
+            except Exception as e:
+                continue
+        return items
+
     def scrape_zoodmall(self, product: str) -> pd.DataFrame:
         """Scrape product data from ZoodMall with enhanced error handling"""
         try:
             # Add random delay
             time.sleep(self.get_random_delay())
             
-            # Try different eBay URLs
-
-            url = f"https://www.zoodmall.uz/search/?q={product.replace(' ', '%20')}"
+            base_url = self.base_urls.get('zoodmall', 'https://www.zoodmall.uz')
+            url = f"{base_url}/search/?q={product.replace(' ', '%20')}"
 
             items = []
 
-            response = self.session.get(url, headers=self.headers, timeout=15)
+            response = self.fetch('zoodmall', product, url, base_url)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')               
-                products = soup.find_all('div', {'class': 'product-item-list'})
-                
-                for product in products:
-                    print(product)
-                    try:
-                        # Try different possible selectors for title and price
-                        title = product.find('div', class_='product-mini__title').text.strip()
-                        
-                        price = product.find('div', class_='product-mini__totalLocalPrice').text.strip()
-                        price = (price.split(' ')[-1]).replace(',', '')
-
-                        link = 'https://www.zoodmall.uz' + soup.find('a', class_='product-mini')['href']
-                        price_value = int(price)/13000
-                        if price_value and price_value > 0:
-                            items.append({
-                                'Title': title,
-                                'Price': price_value,
-                                'Currency': 'USD',
-                                'Source': 'Zoodmall',
-                                'Price_USD': price_value,
-                                'Link': link
-                            })
-                    except Exception as e:
-                        continue         
+                items = self.without_excluded(self.parse_zoodmall(response.content, base_url))
             return pd.DataFrame(items)
         except Exception as e:
             st.warning(f"Error scraping Zoodmall: {str(e)}")
@@ -292,93 +477,142 @@ class PriceScraperMultiUz:
 
 
 # scraping UZUM price data
+    def parse_uzum_api(self, content: bytes, base_url: str) -> List[Dict]:
+        """Extract listings from an Uzum search API response"""
+        return self.structured_items(extract_api_products(content), 'Uzum', base_url, '/uz/product/{id}')
+
+    def parse_uzum(self, content: bytes, base_url: str) -> List[Dict]:
+        """Extract listings from an Uzum search page"""
+        items = self.structured_items(extract_structured(content), 'Uzum', base_url, '/uz/product/{id}')
+        if items:
+            return items
+
+        soup = BeautifulSoup(content, 'html.parser')
+        products = soup.find_all('div', {'class': 'row products-list'})
+
+        for product in products:
+            try:
+                title_tag = product.find('a', class_='product-card')
+                title = title_tag['title'] if title_tag else None
+                price_tag = product.find('span', class_='product-card-price')
+                cleaned_a = price_tag.text.replace(' ', '').replace('so\'m', '').strip()
+                price = int(cleaned_a)
+                link_tag = product.find('a', class_='product-card')
+                link = base_url + link_tag['href'] if link_tag else None
+
+                price_value = int(price)/13000
+                if price_value and price_value > 0:
+                    items.append({
+                        'Title': title,
+                        'Price': price_value,
+                        'Currency': 'USD',
+                        'Source': 'Uzum',
+                        'Price_USD': price_value,
+                        'Link': link
+                    })
+            except Exception as e:
+                continue
+        return items
+
+    def search_uzum_api(self, product: str, base_url: str) -> List[Dict]:
+        """Query Uzum's JSON search endpoint, returning no rows if it is unavailable"""
+        api_url = self.base_urls.get('uzum_api', 'https://graphql.uzum.uz/')
+        payload = {
+            'operationName': 'getMakeSearch',
+            'query': UZUM_SEARCH_QUERY,
+            'variables': {
+                'queryInput': {
+                    'text': product,
+                    'showAdultContent': 'TRUE',
+                    'filters': [],
+                    'sort': 'BY_RELEVANCE_DESC',
+                    'pagination': {'offset': 0, 'limit': 48}
+                }
+            }
+        }
+        try:
+            response = self.fetch('uzum_api', product, api_url, base_url, method='POST', json=payload)
+            if response.status_code != 200:
+                return []
+            return self.without_excluded(self.parse_uzum_api(response.content, base_url))
+        except requests.exceptions.RequestException:
+            return []
+
     def scrape_uzum(self, product: str) -> pd.DataFrame:
         """Scrape product data from Uzum with enhanced error handling"""
         try:
             time.sleep(self.get_random_delay())
-            url = f"https://uzum.uz/uz/search?query={product.replace(' ', '%20')}&needsCorrection=1"
-            items = []
-            response = self.session.get(url, headers=self.headers, timeout=15)
+            base_url = self.base_urls.get('uzum', 'https://uzum.uz')
+
+            items = self.search_uzum_api(product, base_url)
+            if items:
+                return pd.DataFrame(items)
+
+            url = f"{base_url}/uz/search?query={product.replace(' ', '%20')}&needsCorrection=1"
+            response = self.fetch('uzum', product, url, base_url)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                products = soup.find_all('div', {'class': 'row products-list'})
-               
-                for product in products:
-                    print(product)
-                    try:
-                        title_tag = product.find('a', class_='product-card')
-                        title = title_tag['title'] if title_tag else None
-                        price_tag = product.find('span', class_='product-card-price')
-                        cleaned_a = price_tag.replace(' ', '').replace('so\'m', '').strip()
-                        price = int(cleaned_a)
-                        link_tag = product.find('a', class_='product-card')
-                        link = 'https://uzum.uz' + link_tag['href'] if link_tag else None                                              
-
-                        price_value = int(price)/13000
-                        if price_value and price_value > 0:
-                            items.append({
-                                'Title': title,
-                                'Price': price_value,
-                                'Currency': 'USD',
-                                'Source': 'Uzum',
-                                'Price_USD': price_value,
-                                'Link': link
-                            })
-                    except Exception as e:
-                        continue         
+                items = self.without_excluded(self.parse_uzum(response.content, base_url))
             return pd.DataFrame(items)
         except Exception as e:
             st.warning(f"Error scraping Uzum: {str(e)}")
             return pd.DataFrame()
 
 # scraping ASAXIY price data
+    def parse_asaxiy(self, content: bytes, base_url: str) -> List[Dict]:
+        """Extract listings from an Asaxiy search page"""
+        items = self.structured_items(extract_structured(content), 'Asaxiy', base_url)
+        if items:
+            return items
+
+        soup = BeautifulSoup(content, 'html.parser')
+        products = soup.find_all('div', {'class': 'product__item d-flex flex-column justify-content-between'})
+
+        for product in products:
+            try:
+                title_tag = product.find('span', class_='product__item__info-title')
+                title = title_tag.string.strip() if title_tag else None
+
+                price_tag = product.find('span', class_='product__item-price')
+                cleaned_a = price_tag.text.replace(' ', '').replace('сум', '').strip()
+                price = int(cleaned_a)
+
+                # The first anchor in a card is the compare button, not the product page
+                link_tag = product.find('a', href=re.compile(r'/product/'))
+                link = base_url + link_tag['href'] if link_tag else None
+
+                price_value = int(price)/13000
+                if price_value and price_value > 0:
+                    items.append({
+                        'Title': title,
+                        'Price': price_value,
+                        'Currency': 'USD',
+                        'Source': 'Asaxiy',
+                        'Price_USD': price_value,
+                        'Link': link
+                    })
+            except Exception as e:
+                continue
+        return items
 
     def scrape_asaxiy(self, product: str) -> pd.DataFrame:
         """Scrape product data from Asaxiy with enhanced error handling"""
         try:
             time.sleep(self.get_random_delay())
-            url = f"https://asaxiy.uz/product?key={product.replace(' ', '+')}"
+            base_url = self.base_urls.get('asaxiy', 'https://asaxiy.uz')
+            url = f"{base_url}/product?key={product.replace(' ', '+')}"
             items = []
 
-            response = self.session.get(url, headers=self.headers, timeout=15)
-            print(response.status_code)
+            response = self.fetch('asaxiy', product, url, base_url)
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                products = soup.find_all('div', {'class': 'product__item d-flex flex-column justify-content-between'})
-
-                for product in products:
-                    print(product)
-                    try:
-                        title_tag = product.find('span', class_='product__item__info-title')
-                        title = title_tag.string.strip() if title_tag else None
-
-                        price_tag = product.find('span', class_='product__item-price')
-                        cleaned_a = price_tag.text.replace(' ', '').replace('сум', '').strip()
-                        price = int(cleaned_a)
-
-                        link_tag = product.find('a')
-                        link = 'https://asaxiy.uz' + link_tag['href'] if link_tag else None
-
-                        price_value = int(price)/13000
-                        if price_value and price_value > 0:
-                            items.append({
-                                'Title': title,
-                                'Price': price_value,
-                                'Currency': 'USD',
-                                'Source': 'Asaxiy',
-                                'Price_USD': price_value,
-                                'Link': link
-                            })
-                    except Exception as e:
-                        continue
+                items = self.without_excluded(self.parse_asaxiy(response.content, base_url))
             return pd.DataFrame(items)
         except Exception as e:
             st.warning(f"Error scraping Uzum: {str(e)}")
             return pd.DataFrame()
 
-
     def scrape_all(self, product: str) -> pd.DataFrame:
         results = []       
+        self.scrape_id = uuid.uuid4().hex
         zoodmall_df = self.scrape_zoodmall(product)
         if not zoodmall_df.empty:
             results.append(zoodmall_df)
@@ -396,13 +630,7 @@ class PriceScraperMultiUz:
             return pd.DataFrame()
             
         # Combine all results
-        df = pd.concat(results, ignore_index=True)
-        
-        # Remove duplicates and sort by price
-        df = df.drop_duplicates(subset=['Title', 'Price_USD'], keep='first')
-        df = df.sort_values('Price_USD')
-        
-        return df
+        return combine_results(results)
 
 # Define a function to create KDE plots
 def create_kde_plot(data, product_name):
@@ -469,4 +697,36 @@ def source_vis(df, x, title):
         yaxis_title='Soni',
         showlegend=False)
 
-    return fig
\ No newline at end of file
+    return fig
+
+# Datasets and dashboard figures are cached across sessions; `version` is the file mtime,
+# so editing a CSV invalidates everything built from it
+def dataset_version(path: str) -> float:
+    return os.path.getmtime(path)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def load_dataset(path: str, version: float) -> pd.DataFrame:
+    return pd.read_csv(path)
+
+# Build a KDE figure spec once per (dataset version, product, source selection)
+@st.cache_data(max_entries=256, show_spinner=False)
+def kde_figure_spec(path: str, version: float, product: str, sources: Tuple[str, ...]):
+    df = load_dataset(path, version)
+    data = df[(df['Product'] == product) & (df['Source'].isin(sources))]['Price_USD'].dropna()
+    if len(data) < 2:
+        return None
+    return create_kde_plot(data, product).to_dict()
+
+# Build a per-source product count bar chart spec once per (dataset version, product selection)
+@st.cache_data(max_entries=256, show_spinner=False)
+def source_count_figure_spec(path: str, version: float, products: Tuple[str, ...], title: str):
+    df = load_dataset(path, version)
+    source_counts = df[df['Product'].isin(products)].groupby("Source")['Title'].count().reset_index()
+    source_counts.columns = ['Manba', 'Soni']
+    fig = px.bar(
+        source_counts,
+        x="Manba",
+        y="Soni",
+        title=title
+        )
+    return fig.to_dict()